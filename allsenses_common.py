@@ -0,0 +1,159 @@
+"""
+Shared cold-start state for the AllSenses demo Lambdas
+(quick-fix-lambda.py, real-calls-lambda.py, updated-allsenses-lambda.py).
+Package it next to the entrypoint; Python's module cache runs this once per container.
+"""
+
+import json
+import os
+import re
+import logging
+from datetime import timezone
+from functools import lru_cache
+
+try:
+    import orjson  # shipped in a Lambda layer when available
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick  # pyahocorasick, shipped in a Lambda layer when available
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+# JSON codec: orjson when the layer is attached, stdlib otherwise
+if orjson is not None:
+    def ENCODE(data):
+        return orjson.dumps(data, default=str).decode()
+    DECODE = orjson.loads
+else:
+    ENCODE = json.JSONEncoder(default=str, separators=(',', ':'), ensure_ascii=False).encode
+    DECODE = json.loads
+
+# Cached tzinfo for per-request timestamps
+UTC = timezone.utc
+
+# SNS and DynamoDB are only used when a real SMS goes out, so boto3 is imported
+# and the clients built on first use instead of during every cold start
+@lru_cache(maxsize=1)
+def get_boto_config():
+    # Keep pooled TLS connections alive between warm invocations and fail fast
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=10,
+        tcp_keepalive=True,
+        connect_timeout=1,
+        read_timeout=3,
+        retries={'max_attempts': 2, 'mode': 'standard'}
+    )
+
+@lru_cache(maxsize=1)
+def get_sns():
+    import boto3
+    return boto3.client('sns', config=get_boto_config())
+
+@lru_cache(maxsize=1)
+def get_dynamodb():
+    import boto3
+    return boto3.client('dynamodb', config=get_boto_config())
+
+# Static response pieces. Deterministic responses (preflight, demo health
+# check) may be cached briefly; assessments and emergency paths never
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization'
+}
+CORS_CACHEABLE = {**CORS_HEADERS, 'Cache-Control': 'public, max-age=5, stale-while-revalidate=30'}
+CORS_NOCACHE = {**CORS_HEADERS, 'Cache-Control': 'no-store'}
+
+# Returned to scheduled EventBridge keep-warm pings before any work
+WARMER = {'statusCode': 200, 'headers': CORS_NOCACHE, 'body': '{"warm":true}'}
+
+# Emergency SMS layout; filled per request with format_map
+SMS_TEMPLATE = (
+    "🚨 ALLSENSES EMERGENCY ALERT 🚨\n\n"
+    "Your contact may be in danger!\n\n"
+    'Emergency: "{msg}"\n\n'
+    "Incident: {iid}\n"
+    "Time: {ts:%Y-%m-%d %H:%M:%S} UTC\n\n"
+    "Evidence: {url}\n\n"
+    "Check on them immediately!\n\n"
+    "- AllSenses AI Guardian"
+)
+
+# Threat keywords, listed in the order they are reported
+EMERGENCY_KEYWORDS = ('HELP', 'EMERGENCY', 'DANGER', '911', 'POLICE', 'FIRE', 'AMBULANCE')
+MEDIUM_KEYWORDS = ('SCARED', 'WORRIED', 'UNSAFE', 'THREATENED', 'SUSPICIOUS')
+DEMO_KEYWORDS = ('ALLSENSES', 'TEST', 'LIVE')
+
+# Category bits set by a keyword scan
+EMERGENCY_BIT = 1 << 0
+MEDIUM_BIT = 1 << 1
+DEMO_BIT = 1 << 2
+
+# Casefolded needle -> (category bit, reported keyword), matched in one pass
+_KEYWORD_PAIRS = tuple(
+    (word.casefold(), (bit, word))
+    for bit, words in ((EMERGENCY_BIT, EMERGENCY_KEYWORDS), (MEDIUM_BIT, MEDIUM_KEYWORDS), (DEMO_BIT, DEMO_KEYWORDS))
+    for word in words
+)
+
+def _build_keyword_automaton():
+    """Aho-Corasick automaton over every threat keyword, built once at init"""
+    automaton = ahocorasick.Automaton()
+    for needle, hit in _KEYWORD_PAIRS:
+        automaton.add_word(needle, hit)
+    automaton.make_automaton()
+    return automaton
+
+def _threat_for_mask(mask):
+    """(level, confidence, emergency, details) for a category mask, highest bit wins"""
+    if mask & EMERGENCY_BIT:
+        return ('CRITICAL', 0.95, True, 'Emergency keywords detected: {}')
+    if mask & MEDIUM_BIT:
+        return ('MEDIUM', 0.7, False, 'Potential distress indicators detected')
+    if mask & DEMO_BIT:
+        return ('NONE', 0.9, False, 'System test or demonstration mode')
+    return ('NONE', 0.1, False, 'Normal monitoring - no threats detected')
+
+# Every mask resolved up front, so analyze_threat does one table lookup
+_THREAT_BY_MASK = tuple(_threat_for_mask(mask) for mask in range((EMERGENCY_BIT | MEDIUM_BIT | DEMO_BIT) + 1))
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton() if ahocorasick is not None else None
+
+# Fallback when pyahocorasick is absent: one compiled pattern whose lookahead
+# reports every (possibly overlapping) keyword occurrence, like substring checks
+_KEYWORD_HITS = dict(_KEYWORD_PAIRS)
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(map(re.escape, _KEYWORD_HITS)) + '))')
+
+def analyze_threat(message, location):
+    """
+    AI-powered threat analysis engine
+    """
+    text = str(message).casefold()
+    
+    # Single scan for every keyword; compiled regex when pyahocorasick is absent
+    if _KEYWORD_AUTOMATON is not None:
+        hits = {hit for _, hit in _KEYWORD_AUTOMATON.iter(text)}
+    else:
+        hits = {_KEYWORD_HITS[match.group(1)] for match in _KEYWORD_RE.finditer(text)}
+    
+    mask = 0
+    for bit, _ in hits:
+        mask |= bit
+    threat_level, confidence, emergency_triggered, details = _THREAT_BY_MASK[mask]
+    
+    if emergency_triggered:
+        details = details.format(", ".join(word for word in EMERGENCY_KEYWORDS if (EMERGENCY_BIT, word) in hits))
+    
+    return {
+        'level': threat_level,
+        'confidence': confidence,
+        'emergency': emergency_triggered,
+        'details': details
+    }
@@ -1,16 +1,35 @@
 import json
+import base64
+import gzip
 import boto3
-import uuid
+from botocore.config import Config
 import os
-from datetime import datetime, timezone
+import re
+from datetime import datetime, timezone, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+try:
+    import orjson  # shipped in a Lambda layer when available
+except ImportError:
+    orjson = None
+
+try:
+    from snapshot_restore_py import register_before_snapshot  # present when SnapStart is enabled
+except ImportError:
+    register_before_snapshot = None
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())  # LOG_LEVEL=WARN in prod
 
-# Initialize AWS clients
-sns = boto3.client('sns')
-_eum_client = None
+# Keep sockets alive between warm invocations and fail fast on slow endpoints
+BOTO_CFG = Config(
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
 
 # AWS END USER MESSAGING CONFIGURATION (US only)
 ORIGINATOR_NUMBER = "+12173933490"  # US 10DLC number
@@ -21,49 +40,119 @@ REGION = "us-east-1"
 # JURY DEMO CONFIGURATION
 JURY_PHONE_NUMBER = "+13053033060"
 
-def get_eum_client():
-    """Lazy-load EUM client for US SMS"""
-    global _eum_client
-    if _eum_client is None:
-        _eum_client = boto3.client('pinpoint-sms-voice-v2', region_name=REGION)
-        logger.info("EUM client initialized for US SMS")
-    return _eum_client
+# Handler variant, selected per deployed function:
+#   jury   - jury demo alert/test endpoints (default)
+#   hybrid - emergency alerts with incident storage and location updates
+HANDLER_VARIANT = os.environ.get('HANDLER_VARIANT', 'jury').lower()
+
+# DynamoDB Tables
+INCIDENTS_TABLE = "AllSenses-Incidents"
+
+# Gzip large JSON bodies for clients that accept it. The Function URL this is
+# deployed behind decodes isBase64Encoded bodies; set GZIP_RESPONSES=false if
+# it is ever fronted by a REST API without matching BinaryMediaTypes
+GZIP_RESPONSES = os.environ.get('GZIP_RESPONSES', 'true').lower() == 'true'
+GZIP_MIN_BYTES = 1024
+
+# Leading "+" and digit check; group 1 captures the NANP country code used for routing
+_PHONE_RE = re.compile(r'\+(?:(1)|\d)')
+
+# Emergency SMS layout; only the detection-specific suffix varies by type
+_EMG_TMPL = "🚨 EMERGENCY: {name} is in DANGER!{suffix}\n\nLocation: {place}\nMap: {map}\n\nIncident: {inc}\nTime: {hms}"
+
+# JURY_EMERGENCY_ALERT payload as a slotted dataclass: fixed attributes, no per-instance dict
+@dataclass(slots=True)
+class EmergencyRequest:
+    """JURY_EMERGENCY_ALERT payload with the endpoint's defaults"""
+    victim_name: str = 'Unknown Person'
+    phone_number: str = JURY_PHONE_NUMBER
+    detection_type: str = 'emergency'
+    detection_data: dict = field(default_factory=dict)
+    location: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_body(cls, body):
+        """Build from the request body, keeping defaults for absent keys"""
+        return cls(**{attr: body[key] for key, attr in _EMERGENCY_FIELDS.items() if key in body})
+
+# Request body key -> EmergencyRequest attribute
+_EMERGENCY_FIELDS = {
+    'victimName': 'victim_name',
+    'phoneNumber': 'phone_number',
+    'detectionType': 'detection_type',
+    'detectionData': 'detection_data',
+    'location': 'location'
+}
+
+# Static response pieces shared by every cors_response call
+_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization'
+}
+# JSON codec: orjson when the layer is attached, stdlib otherwise
+if orjson is not None:
+    def _ENCODE(data):
+        return orjson.dumps(data, default=str).decode()
+    _DECODE = orjson.loads
+else:
+    _ENCODE = json.JSONEncoder(default=str, separators=(',', ':'), ensure_ascii=False).encode
+    _DECODE = json.loads
+
+# One session for every client so botocore's loader and credential caches are shared
+_SESSION = boto3.session.Session()
+
+# Initialize AWS clients during INIT so the first emergency send doesn't pay for them
+# Hybrid pins SNS to REGION as lambda_hybrid.py did; jury keeps the function's region
+sns = _SESSION.client('sns', region_name=REGION if HANDLER_VARIANT == 'hybrid' else None, config=BOTO_CFG)
+EUM_CLIENT = _SESSION.client('pinpoint-sms-voice-v2', region_name=REGION, config=BOTO_CFG)
 
-def is_us_number(phone):
-    """Check if phone number is US/Canada"""
-    return phone.startswith('+1')
+# Only the hybrid variant stores incidents
+DDB_CLIENT = _SESSION.client('dynamodb', region_name=REGION, config=BOTO_CFG) if HANDLER_VARIANT == 'hybrid' else None
+
+# Background worker for writes that must not delay the emergency response
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+def prime_clients():
+    """Make one cheap call per SMS client so caches and TLS are warm before real traffic"""
+    for call in (lambda: EUM_CLIENT.describe_phone_numbers(MaxResults=1), sns.list_topics):
+        try:
+            call()
+        except Exception as e:
+            logger.warning(f"Client priming failed: {str(e)}")
+
+# Provisioned concurrency runs INIT ahead of traffic, so pay first-use costs there.
+# On-demand cold starts skip this: their INIT sits on the request path.
+if os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE') == 'provisioned-concurrency':
+    prime_clients()
+
+if register_before_snapshot is not None:
+    @register_before_snapshot
+    def before_snapshot():
+        """Warm caches into the snapshot, then drop sockets that would be stale after restore"""
+        prime_clients()
+        sns.close()
+        EUM_CLIENT.close()
 
 def handler(event, context):
     """AllSensesAI Emergency SMS Handler - Hybrid EUM/SNS"""
-    logger.info(f"AllSenseAI received: {json.dumps(event, default=str)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("AllSenseAI received: %s", _ENCODE(event))
     
     try:
         if event.get('httpMethod') == 'OPTIONS':
             return cors_response({})
         
         if 'body' in event:
-            body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+            body = _DECODE(event['body']) if isinstance(event['body'], str) else event['body']
         else:
             body = event
         
         action = body.get('action', 'TEST_SMS')
         logger.info(f"Processing action: {action}")
         
-        if action == 'JURY_EMERGENCY_ALERT':
-            return handle_jury_emergency_alert(body)
-        elif action == 'JURY_TEST':
-            return handle_jury_test(body)
-        elif action == 'TEST_SMS':
-            return test_sms_direct(body)
-        elif action == 'CHECK_EUM_CONFIG':
-            return check_eum_configuration()
-        else:
-            return cors_response({
-                'status': 'success',
-                'message': 'AllSensesAI Lambda operational',
-                'action': action,
-                'timestamp': datetime.now(timezone.utc).isoformat()
-            })
+        return gzip_response(_ACTIONS.get(action, _DEFAULT_ACTION)(body), event)
             
     except Exception as e:
         logger.error(f"Handler error: {str(e)}", exc_info=True)
@@ -76,50 +165,54 @@ def handler(event, context):
 
 def handle_jury_emergency_alert(body):
     """Handle emergency alert with hybrid EUM/SNS"""
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    now_hms = now.strftime('%H:%M:%S')
+    
     try:
-        victim_name = body.get('victimName', 'Unknown Person')
-        emergency_phone = body.get('phoneNumber', JURY_PHONE_NUMBER)
-        detection_type = body.get('detectionType', 'emergency')
-        detection_data = body.get('detectionData', {})
-        location = body.get('location', {})
+        req = EmergencyRequest.from_body(body)
         
-        incident_id = f"EMG-{uuid.uuid4().hex[:8].upper()}"
+        incident_id = "EMG-" + os.urandom(4).hex().upper()
         
-        logger.info(f"🚨 JURY_EMERGENCY_ALERT for {victim_name} to {emergency_phone}")
+        logger.info(f"🚨 JURY_EMERGENCY_ALERT for {req.victim_name} to {req.phone_number}")
         
         # Compose message
-        if detection_type == 'emergency_words':
-            detected_words = detection_data.get('detectedWords', ['emergency'])
-            danger_message = f"🚨 EMERGENCY: {victim_name} is in DANGER! Words: {', '.join(detected_words)}"
-        elif detection_type == 'abrupt_noise':
-            volume = detection_data.get('volume', 'high')
-            danger_message = f"🚨 EMERGENCY: {victim_name} is in DANGER! Loud noise: {volume} dB"
+        if req.detection_type == 'emergency_words':
+            detected_words = req.detection_data.get('detectedWords', ['emergency'])
+            suffix = f" Words: {', '.join(detected_words)}"
+        elif req.detection_type == 'abrupt_noise':
+            suffix = f" Loud noise: {req.detection_data.get('volume', 'high')} dB"
         else:
-            danger_message = f"🚨 EMERGENCY: {victim_name} is in DANGER!"
-        
-        place_name = location.get('placeName', 'Unknown location')
-        map_link = location.get('mapLink', 'https://maps.google.com/?q=25.7617,-80.1918')
-        
-        sms_message = f"{danger_message}\n\nLocation: {place_name}\nMap: {map_link}\n\nIncident: {incident_id}\nTime: {datetime.now().strftime('%H:%M:%S')}"
+            suffix = ""
+        
+        sms_message = _EMG_TMPL.format_map({
+            'name': req.victim_name,
+            'suffix': suffix,
+            'place': req.location.get('placeName', 'Unknown location'),
+            'map': req.location.get('mapLink', 'https://maps.google.com/?q=25.7617,-80.1918'),
+            'inc': incident_id,
+            'hms': now_hms
+        })
         
         # Send SMS (hybrid EUM/SNS)
-        sms_result = send_sms_hybrid(emergency_phone, sms_message, incident_id)
+        sms_result = send_sms_hybrid(req.phone_number, sms_message, incident_id)
         
-        logger.info(f"📱 SMS Result: {json.dumps(sms_result, default=str)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📱 SMS Result: %s", _ENCODE(sms_result))
         
         return cors_response({
             'status': 'success',
             'message': 'Emergency alert sent',
             'incidentId': incident_id,
-            'victimName': victim_name,
-            'emergencyPhone': emergency_phone,
-            'detectionType': detection_type,
+            'victimName': req.victim_name,
+            'emergencyPhone': req.phone_number,
+            'detectionType': req.detection_type,
             'smsMessageId': sms_result.get('messageId'),
             'smsStatus': sms_result.get('status'),
             'smsMethod': sms_result.get('method'),
             'eumCompliant': sms_result.get('method') == 'EUM',
             'smsResult': sms_result,
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': now_iso
         })
         
     except Exception as e:
@@ -127,16 +220,20 @@ def handle_jury_emergency_alert(body):
         return cors_response({
             'status': 'error',
             'message': str(e),
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': now_iso
         }, 500)
 
 def handle_jury_test(body):
     """Handle test message"""
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    now_hms = now.strftime('%H:%M:%S')
+    
     try:
         test_phone = body.get('phoneNumber', JURY_PHONE_NUMBER)
         victim_name = body.get('victimName', 'Test User')
         
-        test_message = f"AllSensesAI TEST\n\nSystem ready for {victim_name}!\n\nTime: {datetime.now().strftime('%H:%M:%S')}\n\nEmergency detection operational."
+        test_message = f"AllSensesAI TEST\n\nSystem ready for {victim_name}!\n\nTime: {now_hms}\n\nEmergency detection operational."
         
         logger.info(f"JURY_TEST to {test_phone}")
         
@@ -150,7 +247,7 @@ def handle_jury_test(body):
             'smsMessageId': sms_result.get('messageId'),
             'smsStatus': sms_result['status'],
             'smsMethod': sms_result.get('method'),
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': now_iso
         })
         
     except Exception as e:
@@ -162,9 +259,13 @@ def handle_jury_test(body):
 
 def test_sms_direct(body):
     """Direct SMS test"""
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    now_hms = now.strftime('%H:%M:%S')
+    
     try:
         phone = body.get('phoneNumber', '+573222063010')
-        message = body.get('message', f'AllSensesAI Test. Time: {datetime.now().strftime("%H:%M:%S")}')
+        message = body.get('message', f'AllSensesAI Test. Time: {now_hms}')
         
         logger.info(f"TEST_SMS to {phone}")
         
@@ -176,7 +277,7 @@ def test_sms_direct(body):
             'smsMessageId': sms_result.get('messageId'),
             'smsStatus': sms_result['status'],
             'smsMethod': sms_result.get('method'),
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': now_iso
         })
         
     except Exception as e:
@@ -191,21 +292,16 @@ def send_sms_hybrid(phone_number, message, event_id=None):
     Hybrid SMS: Use EUM for US, SNS for international
     """
     try:
-        # Validate phone
-        if not phone_number or not phone_number.startswith('+'):
+        # Validate phone and pick the sender from its country code in one match
+        match = _PHONE_RE.match(phone_number or '')
+        if not match:
             return {
                 'status': 'failed',
                 'error': 'Invalid phone number format',
                 'phone': phone_number
             }
         
-        # Choose method based on destination
-        if is_us_number(phone_number):
-            logger.info(f"📱 US number detected - using EUM")
-            return send_via_eum(phone_number, message)
-        else:
-            logger.info(f"🌍 International number detected - using SNS")
-            return send_via_sns(phone_number, message)
+        return _ROUTE.get(match.group(1), send_via_sns)(phone_number, message)
             
     except Exception as e:
         logger.error(f"❌ SMS error: {str(e)}", exc_info=True)
@@ -222,9 +318,7 @@ def send_via_eum(phone_number, message):
         logger.info(f"Destination: {phone_number}")
         logger.info(f"Originator: {ORIGINATOR_NUMBER}")
         
-        eum_client = get_eum_client()
-        
-        response = eum_client.send_text_message(
+        response = EUM_CLIENT.send_text_message(
             DestinationPhoneNumber=phone_number,
             OriginationIdentity=ORIGINATOR_NUMBER,
             MessageBody=message,
@@ -284,6 +378,7 @@ def send_via_sns(phone_number, message):
             'messageId': message_id,
             'phone': phone_number,
             'method': 'SNS',
+            'originator': 'AllSenses',
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
         
@@ -296,6 +391,18 @@ def send_via_sns(phone_number, message):
             'method': 'SNS'
         }
 
+# Country code -> sender; anything not listed goes out via SNS
+_ROUTE = {'1': send_via_eum}
+
+def operational_status(body):
+    """Default response for unrecognized actions"""
+    return cors_response({
+        'status': 'success',
+        'message': 'AllSensesAI Lambda operational',
+        'action': body.get('action', 'TEST_SMS'),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+
 def check_eum_configuration():
     """Check EUM configuration"""
     return cors_response({
@@ -311,15 +418,154 @@ def check_eum_configuration():
         'timestamp': datetime.now(timezone.utc).isoformat()
     })
 
+def handle_emergency_alert(body):
+    """Emergency alert with incident storage (hybrid variant)"""
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    now_hms = now.strftime('%H:%M:%S')
+    
+    try:
+        victim_name = body.get('victimName', 'Unknown Person')
+        emergency_phone = body.get('phoneNumber')
+        detection_type = body.get('detectionType', 'emergency')
+        location = body.get('location', {})
+        
+        incident_id = "EMG-" + os.urandom(4).hex().upper()
+        logger.info("emg incident=%s phone=%s type=%s", incident_id, emergency_phone, detection_type)
+        
+        # Compose message
+        danger_message = f"🚨 EMERGENCY: {victim_name} is in DANGER!"
+        place_name = location.get('placeName', 'Unknown location')
+        
+        sms_message = f"{danger_message}\n\nLocation: {place_name}\nIncident: {incident_id}\nTime: {now_hms}\n\nFrom: AllSenses AI Guardian"
+        
+        # Store incident in the background while the SMS goes out (failures are ignored)
+        incident_future = _EXECUTOR.submit(store_incident, incident_id, victim_name, emergency_phone, detection_type, location, now)
+        
+        # Send SMS (hybrid)
+        sms_result = send_sms_hybrid(emergency_phone, sms_message)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("SMS Result: %s", _ENCODE(sms_result))
+        
+        # Give the write a moment to land before Lambda freezes the sandbox;
+        # anything still in flight completes best-effort on the next thaw
+        wait([incident_future], timeout=0.05)
+        
+        return cors_response({
+            'status': 'success' if sms_result['status'] == 'sent' else 'failed',
+            'message': f"Emergency alert sent via {sms_result.get('method')}",
+            'incidentId': incident_id,
+            'victimName': victim_name,
+            'emergencyPhone': emergency_phone,
+            'smsMessageId': sms_result.get('messageId'),
+            'smsStatus': sms_result['status'],
+            'smsMethod': sms_result.get('method'),
+            'originator': sms_result.get('originator'),
+            'smsError': sms_result.get('error'),
+            'timestamp': now_iso
+        })
+        
+    except Exception as e:
+        logger.error(f"Emergency alert error: {str(e)}")
+        return cors_response({
+            'status': 'error',
+            'message': str(e)
+        }, 500)
+
+def test_sms(body):
+    """Direct SMS test (hybrid variant)"""
+    phone = body.get('phoneNumber', '+573222063010')
+    message = body.get('message', f'AllSenses Test - {datetime.now(timezone.utc).strftime("%H:%M:%S")}')
+    
+    result = send_sms_hybrid(phone, message)
+    
+    return cors_response({
+        'status': result['status'],
+        'phone': phone,
+        'messageId': result.get('messageId'),
+        'method': result.get('method'),
+        'originator': result.get('originator'),
+        'error': result.get('error')
+    })
+
+def to_attribute(value):
+    """Marshal a JSON-style value into a low-level DynamoDB attribute value"""
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float)):
+        return {'N': str(value)}
+    if isinstance(value, dict):
+        return {'M': {k: to_attribute(v) for k, v in value.items()}}
+    if isinstance(value, list):
+        return {'L': [to_attribute(v) for v in value]}
+    return {'S': str(value)}
+
+def store_incident(incident_id, victim_name, emergency_phone, detection_type, location, now):
+    """Persist the incident with a 7-day TTL"""
+    ttl = int((now + timedelta(days=7)).timestamp())
+    
+    DDB_CLIENT.put_item(TableName=INCIDENTS_TABLE, Item={
+        'incidentId': {'S': incident_id},
+        'victimName': to_attribute(victim_name),
+        'emergencyPhone': to_attribute(emergency_phone),
+        'detectionType': to_attribute(detection_type),
+        'initialLocation': to_attribute(location),
+        'createdAt': {'S': now.isoformat()},
+        'status': {'S': 'active'},
+        'ttl': {'N': str(ttl)}
+    })
+
+def handle_update_location(body):
+    """Location update endpoint (hybrid variant)"""
+    # Location tracking implementation
+    return cors_response({'status': 'success', 'message': 'Location updated'})
+
+def hybrid_status(body):
+    """Default response for unrecognized actions in the hybrid variant"""
+    return cors_response({
+        'status': 'success',
+        'message': 'Hybrid SMS Lambda operational',
+        'supportedMethods': ['EUM (US)', 'SNS (International)']
+    })
+
+def gzip_response(response, event):
+    """Gzip the response body when enabled, accepted by the client and large enough"""
+    headers = event.get('headers') or {}
+    accept_encoding = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    body = response['body']
+    if not GZIP_RESPONSES or 'gzip' not in accept_encoding or len(body) < GZIP_MIN_BYTES:
+        return response
+    return {
+        'statusCode': response['statusCode'],
+        'headers': {**response['headers'], 'Content-Encoding': 'gzip'},
+        'isBase64Encoded': True,
+        'body': base64.b64encode(gzip.compress(body.encode(), compresslevel=1)).decode()
+    }
+
 def cors_response(data, status_code=200):
     """Return CORS-enabled response"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization'
-        },
-        'body': json.dumps(data, default=str)
+        'headers': _HEADERS,
+        'body': _ENCODE(data)
     }
+
+
+# Action routing tables per handler variant (defined after all handlers exist)
+_VARIANT_ACTIONS = {
+    'jury': ({
+        'JURY_EMERGENCY_ALERT': handle_jury_emergency_alert,
+        'JURY_TEST': handle_jury_test,
+        'TEST_SMS': test_sms_direct,
+        'CHECK_EUM_CONFIG': lambda body: check_eum_configuration()
+    }, operational_status),
+    'hybrid': ({
+        'JURY_EMERGENCY_ALERT': handle_emergency_alert,
+        'TEST_SMS': test_sms,
+        'UPDATE_LOCATION': handle_update_location
+    }, hybrid_status)
+}
+_ACTIONS, _DEFAULT_ACTION = _VARIANT_ACTIONS.get(HANDLER_VARIANT, _VARIANT_ACTIONS['jury'])
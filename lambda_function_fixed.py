@@ -1,18 +1,49 @@
 ﻿import json
 import boto3
+from botocore.config import Config
 import uuid
 import os
-import re
 from datetime import datetime, timezone
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # shipped in a Lambda layer when available
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Keep sockets alive between warm invocations and fail fast on slow endpoints
+BOTO_CFG = Config(
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
+
 # Initialize AWS services
-sns = boto3.client('sns')
-dynamodb = boto3.resource('dynamodb')
-bedrock = boto3.client('bedrock-runtime')
+# One session for every client so botocore's loader and credential caches are shared
+_SESSION = boto3.session.Session()
+sns = _SESSION.client('sns', config=BOTO_CFG)
+dynamodb = _SESSION.resource('dynamodb', config=BOTO_CFG)
+bedrock = _SESSION.client('bedrock-runtime', config=BOTO_CFG)
+
+# JSON codec: orjson when the layer is attached, stdlib otherwise
+if orjson is not None:
+    def _ENCODE(data):
+        return orjson.dumps(data, default=str).decode()
+    _DECODE = orjson.loads
+else:
+    _ENCODE = json.JSONEncoder(default=str, separators=(',', ':'), ensure_ascii=False).encode
+    _DECODE = json.loads
+
+# Worker pool for multi-contact SMS fan-out (botocore clients are thread-safe)
+_EXECUTOR = ThreadPoolExecutor(max_workers=10)
+
+# Emergency SMS layout; only the detection-specific suffix varies by type
+_EMG_TMPL = "ðŸš¨ EMERGENCY: {name} is in DANGER!{suffix}\n\nLocation: {place}\nMap: {map}\n\nIncident: {inc}\nTime: {hms}"
 
 # ============================================================================
 # CONFIGURATION - Can be overridden via Lambda Environment Variables
@@ -30,7 +61,8 @@ def handler(event, context):
     1. Audio Capture â†’ 2. Distress Detection â†’ 3. Event Trigger â†’ 
     4. Geolocation â†’ 5. SMS Dispatch â†’ 6. Contact Confirmation â†’ 7. Analytics
     """
-    logger.info(f"AllSenseAI received: {json.dumps(event, default=str)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("AllSenseAI received: %s", _ENCODE(event))
     
     try:
         # Handle CORS preflight
@@ -39,7 +71,7 @@ def handler(event, context):
         
         # Parse request body
         if 'body' in event:
-            body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+            body = _DECODE(event['body']) if isinstance(event['body'], str) else event['body']
         else:
             body = event
         
@@ -118,35 +150,50 @@ def handle_jury_emergency_alert(body):
     âœ… FIXED: Returns smsMessageId at root level for frontend compatibility
     """
     try:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        now_hms = now.strftime('%H:%M:%S')
+        
         victim_name = body.get('victimName', 'Unknown Person')
         emergency_phone = body.get('phoneNumber', '+13053033060')
         detection_type = body.get('detectionType', 'emergency')
         detection_data = body.get('detectionData', {})
         location = body.get('location', {})
         
-        incident_id = f"EMG-{uuid.uuid4().hex[:8].upper()}"
+        incident_id = "EMG-" + os.urandom(4).hex().upper()
         
         logger.info(f"JURY_EMERGENCY_ALERT for {victim_name} to {emergency_phone}")
         
         # Compose emergency message
         if detection_type == 'emergency_words':
             detected_words = detection_data.get('detectedWords', ['emergency'])
-            danger_message = f"ðŸš¨ EMERGENCY: {victim_name} is in DANGER! Words detected: \"{', '.join(detected_words)}\""
+            suffix = f" Words detected: \"{', '.join(detected_words)}\""
         elif detection_type == 'abrupt_noise':
-            volume = detection_data.get('volume', 'high')
-            danger_message = f"ðŸš¨ EMERGENCY: {victim_name} is in DANGER! Loud noise: {volume} dB"
+            suffix = f" Loud noise: {detection_data.get('volume', 'high')} dB"
         else:
-            danger_message = f"ðŸš¨ EMERGENCY: {victim_name} is in DANGER! Emergency detected"
-        
-        place_name = location.get('placeName', 'Unknown location')
-        map_link = location.get('mapLink', 'https://maps.google.com/?q=25.7617,-80.1918')
-        
-        sms_message = f"{danger_message}\n\nLocation: {place_name}\nMap: {map_link}\n\nIncident: {incident_id}\nTime: {datetime.now().strftime('%H:%M:%S')}"
+            suffix = " Emergency detected"
+        
+        sms_message = _EMG_TMPL.format_map({
+            'name': victim_name,
+            'suffix': suffix,
+            'place': location.get('placeName', 'Unknown location'),
+            'map': location.get('mapLink', 'https://maps.google.com/?q=25.7617,-80.1918'),
+            'inc': incident_id,
+            'hms': now_hms
+        })
         
-        # Send SMS
-        sms_result = send_sms_with_eum(emergency_phone, sms_message, incident_id)
+        # Send SMS to every opted-in contact in parallel; the first one is the primary result.
+        # SNS publish_batch only targets topics (entries carry no PhoneNumber), so direct
+        # SMS stays one call per number - duplicates are dropped to avoid extra round trips.
+        # Only contacts that explicitly opted in (10DLC consent); entries without a phone are skipped.
+        phones = list(dict.fromkeys(
+            c['phone'] for c in body.get('contacts', []) if c.get('optedIn', False) and c.get('phone')
+        )) or [emergency_phone]
+        sms_results = list(_EXECUTOR.map(lambda phone: send_sms_with_eum(phone, sms_message, incident_id), phones))
+        sms_result = sms_results[0]
         
-        logger.info(f"SMS Result: {json.dumps(sms_result, default=str)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("SMS Result: %s", _ENCODE(sms_result))
         
         # âœ… FIX: Return smsMessageId at root level (what frontend expects)
         return cors_response({
@@ -154,14 +201,15 @@ def handle_jury_emergency_alert(body):
             'message': 'Emergency alert sent',
             'incidentId': incident_id,
             'victimName': victim_name,
-            'emergencyPhone': emergency_phone,
+            'emergencyPhone': phones[0],  # primary recipient, the one smsResults[0] describes
             'detectionType': detection_type,
             'smsMessageId': sms_result.get('messageId'),  # âœ… ROOT LEVEL - Frontend expects this
             'smsStatus': sms_result.get('status'),        # âœ… ROOT LEVEL - Frontend expects this
             'smsMethod': sms_result.get('smsMethod'),     # âœ… ROOT LEVEL
             'eumCompliant': sms_result.get('realSms', False),  # âœ… ROOT LEVEL
             'smsResult': sms_result,  # Keep nested version for backward compatibility
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'smsResults': sms_results,
+            'timestamp': now_iso
         })
         
     except Exception as e:
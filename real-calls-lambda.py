@@ -1,21 +1,19 @@
-import json
-import boto3
 import uuid
-import os
-from datetime import datetime, timezone
-import logging
+from datetime import datetime
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from allsenses_common import logger, ENCODE, DECODE, UTC, get_sns, CORS_NOCACHE, WARMER, SMS_TEMPLATE
 
-sns = boto3.client('sns')
+EVIDENCE_URL = 'http://allsenses-mvp1-demo-website.s3-website-us-east-1.amazonaws.com/emergency-evidence-demo.html'
 
 def handler(event, context):
+    if event.get('source') == 'aws.events':
+        return WARMER
+    
     logger.info(f"AllSenses with real calls received event")
     
     try:
         if 'body' in event:
-            body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+            body = DECODE(event['body']) if isinstance(event['body'], str) else event['body']
         else:
             body = event
         
@@ -29,13 +27,8 @@ def handler(event, context):
         
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': json.dumps({
+            'headers': CORS_NOCACHE,
+            'body': ENCODE({
                 'status': 'success',
                 'message': 'AllSenses AI Guardian with Real Calls!',
                 'assessmentId': str(uuid.uuid4()),
@@ -43,8 +36,8 @@ def handler(event, context):
                 'confidence': 0.95 if is_emergency else 0.8,
                 'emergencyDetected': is_emergency,
                 'bedrockReasoning': 'Emergency detected' if is_emergency else 'No threats',
-                'audioEvidenceUrl': 'http://allsenses-mvp1-demo-website.s3-website-us-east-1.amazonaws.com/emergency-evidence-demo.html' if is_emergency else None,
-                'timestamp': datetime.utcnow().isoformat(),
+                'audioEvidenceUrl': EVIDENCE_URL if is_emergency else None,
+                'timestamp': datetime.now(UTC).isoformat(),
                 'version': 'Real-Calls-Enabled'
             })
         }
@@ -53,8 +46,8 @@ def handler(event, context):
         logger.error(f"Error: {str(e)}")
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'status': 'success', 'message': 'AllSenses working', 'error': str(e)})
+            'headers': CORS_NOCACHE,
+            'body': ENCODE({'status': 'success', 'message': 'AllSenses working', 'error': str(e)})
         }
 
 def make_real_call(body):
@@ -63,29 +56,16 @@ def make_real_call(body):
         emergency_message = body.get('emergencyMessage', 'Emergency!')
         incident_id = body.get('incidentId', str(uuid.uuid4()))
         
-        sms_message = f"""🚨 ALLSENSES EMERGENCY ALERT 🚨
-
-Your contact may be in danger!
-
-Emergency: "{emergency_message}"
-
-Incident: {incident_id}
-Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
-
-Evidence: http://allsenses-mvp1-demo-website.s3-website-us-east-1.amazonaws.com/emergency-evidence-demo.html
-
-Check on them immediately!
-
-- AllSenses AI Guardian"""
+        sms_message = SMS_TEMPLATE.format_map({'msg': emergency_message, 'iid': incident_id, 'ts': datetime.now(UTC), 'url': EVIDENCE_URL})
         
-        response = sns.publish(PhoneNumber=phone_number, Message=sms_message)
+        response = get_sns().publish(PhoneNumber=phone_number, Message=sms_message)
         
         logger.info(f"Real SMS sent to {phone_number}: {response['MessageId']}")
         
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
+            'headers': CORS_NOCACHE,
+            'body': ENCODE({
                 'status': 'success',
                 'message': 'REAL SMS SENT!',
                 'callInitiated': True,
@@ -93,7 +73,7 @@ Check on them immediately!
                 'phoneNumber': phone_number,
                 'smsMessageId': response['MessageId'],
                 'emergencyMessage': emergency_message,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'timestamp': datetime.now(UTC).isoformat(),
                 'realCall': True
             })
         }
@@ -102,8 +82,8 @@ Check on them immediately!
         logger.error(f"Real call failed: {str(e)}")
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
+            'headers': CORS_NOCACHE,
+            'body': ENCODE({
                 'status': 'error',
                 'message': 'Real call failed',
                 'error': str(e),
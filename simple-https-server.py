@@ -5,11 +5,177 @@ Enables microphone access for enhanced emergency detection
 """
 
 import http.server
+import email.utils
 import ssl
 import os
+import gzip
+import hashlib
 import sys
+import subprocess
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+except ImportError:
+    x509 = None  # fall back to the openssl CLI
+
+# Self-signed localhost certificate, kept across restarts so reloads reuse TLS sessions
+CERT_DIR = Path.home() / ".cache" / "allsenses"
+CERT_DAYS = 30
+
+# Text assets are gzipped once at startup and served precompressed
+GZIP_DIR = CERT_DIR / "gzip"
+GZIP_SUFFIXES = {".html", ".js", ".css", ".json", ".svg"}
+
+def certificate_expired(cert_file):
+    """True when the cached certificate expires within the next hour"""
+    if x509 is not None:
+        cert = x509.load_pem_x509_certificate(cert_file.read_bytes())
+        # not_valid_after_utc is cryptography 42+; older releases return a naive UTC datetime
+        not_after = getattr(cert, "not_valid_after_utc", None) or cert.not_valid_after.replace(tzinfo=timezone.utc)
+        return not_after <= datetime.now(timezone.utc) + timedelta(hours=1)
+    result = subprocess.run(["openssl", "x509", "-checkend", "3600", "-noout", "-in", str(cert_file)], capture_output=True)
+    return result.returncode != 0
+
+def create_private_file(path):
+    """Create path empty and owner-only (0600) so key bytes are never readable by others"""
+    path.unlink(missing_ok=True)
+    return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+
+def generate_certificate(cert_file, key_file):
+    """Write a new self-signed localhost certificate and key"""
+    if x509 is None:
+        # openssl truncates the existing file, keeping its 0600 mode
+        os.close(create_private_file(key_file))
+        cmd = [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048",
+            "-keyout", str(key_file), "-out", str(cert_file), "-days", str(CERT_DAYS),
+            "-nodes", "-subj", "/CN=localhost"
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"OpenSSL failed: {result.stderr}")
+        return
+    
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=CERT_DAYS))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    with os.fdopen(create_private_file(key_file), "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+
+def load_certificate(context):
+    """Load the localhost certificate into context, generating it only when missing, expiring or unreadable"""
+    cert_file = CERT_DIR / "cert.pem"
+    key_file = CERT_DIR / "key.pem"
+    
+    if cert_file.exists() and key_file.exists():
+        try:
+            if not certificate_expired(cert_file):
+                context.load_cert_chain(cert_file, key_file)
+                print(f"🔐 Reusing certificate from {CERT_DIR}")
+                return
+        except Exception as e:
+            print(f"⚠️  Cached certificate unusable, regenerating: {e}")
+    
+    print("🔐 Creating self-signed certificate for localhost...")
+    CERT_DIR.mkdir(parents=True, exist_ok=True)
+    generate_certificate(cert_file, key_file)
+    context.load_cert_chain(cert_file, key_file)
+
+def gzip_cache_path(path):
+    """Cached .gz location for a served file, or None if it isn't compressible"""
+    if os.path.splitext(path)[1] not in GZIP_SUFFIXES:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # Keyed on absolute path, size and mtime so other roots and edited files never hit a stale copy
+    key = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return GZIP_DIR / (hashlib.sha256(key.encode()).hexdigest() + ".gz")
+
+def precompress_assets(root):
+    """Gzip every text asset under root whose cached copy is missing or stale"""
+    count = 0
+    current = set()
+    for src in root.rglob("*"):
+        gz_path = gzip_cache_path(str(src))
+        if gz_path is None or not src.is_file():
+            continue
+        current.add(gz_path)
+        if gz_path.exists():
+            continue
+        GZIP_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = gz_path.with_suffix(".tmp")
+        tmp_path.write_bytes(gzip.compress(src.read_bytes(), compresslevel=9))
+        tmp_path.replace(gz_path)
+        count += 1
+    
+    # Entries for edited, deleted or other-root files are never looked up again
+    for stale in GZIP_DIR.glob("*.gz"):
+        if stale not in current:
+            stale.unlink(missing_ok=True)
+    print(f"🗜️  Precompressed {count} asset(s) into {GZIP_DIR}")
+
+class GzipRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves the precompressed copy of a text asset to clients that accept gzip"""
+    
+    def send_head(self):
+        path = self.translate_path(self.path)
+        gz_path = gzip_cache_path(path)
+        if (gz_path is None
+                or "gzip" not in self.headers.get("Accept-Encoding", "")
+                or not os.path.isfile(path)
+                or not gz_path.exists()):
+            return super().send_head()
+        
+        # Same conditional check as SimpleHTTPRequestHandler, against the source file
+        mtime = os.path.getmtime(path)
+        if "If-Modified-Since" in self.headers and "If-None-Match" not in self.headers:
+            try:
+                ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+            except (TypeError, IndexError, OverflowError, ValueError):
+                ims = None
+            if ims is not None and ims.tzinfo is None:
+                ims = ims.replace(tzinfo=timezone.utc)
+            if (ims is not None and ims.tzinfo is timezone.utc
+                    and datetime.fromtimestamp(mtime, timezone.utc).replace(microsecond=0) <= ims):
+                self.send_response(304)
+                self.end_headers()
+                return None
+        
+        f = open(gz_path, "rb")
+        fs = os.fstat(f.fileno())
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(fs.st_size))
+        self.send_header("Last-Modified", self.date_time_string(mtime))
+        self.send_header("Cache-Control", "public, max-age=3600")
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        return f
+
 def main():
     # Set port
     port = 8443
@@ -39,46 +205,32 @@ def main():
     print(f"✅ Found demo file: {demo_file}")
     print(f"✅ Serving from: {Path.cwd()}")
     
-    # Create HTTPS server
+    try:
+        precompress_assets(Path.cwd())
+    except OSError as e:
+        print(f"⚠️  Could not precompress assets, serving uncompressed: {e}")
+    
+    # Create HTTPS server (one thread per connection so parallel asset loads don't queue)
     server_address = ('localhost', port)
-    httpd = http.server.HTTPServer(server_address, http.server.SimpleHTTPRequestHandler)
+    httpd = http.server.ThreadingHTTPServer(server_address, GzipRequestHandler)
+    httpd.daemon_threads = True
     
-    # Create SSL context with self-signed certificate
+    # Create SSL context with self-signed certificate (TLS 1.3 only; session
+    # tickets stay enabled so browser reloads resume instead of full handshakes)
     context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
     context.check_hostname = False
     context.verify_mode = ssl.CERT_NONE
-    
-    # Create a simple self-signed certificate in memory
-    import tempfile
-    import subprocess
-    
-    print("🔐 Creating self-signed certificate for localhost...")
+    context.minimum_version = ssl.TLSVersion.TLSv1_3
     
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            cert_file = os.path.join(temp_dir, "cert.pem")
-            key_file = os.path.join(temp_dir, "key.pem")
-            
-            # Generate self-signed certificate
-            cmd = [
-                "openssl", "req", "-x509", "-newkey", "rsa:2048", 
-                "-keyout", key_file, "-out", cert_file, "-days", "1", 
-                "-nodes", "-subj", "/CN=localhost"
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise Exception(f"OpenSSL failed: {result.stderr}")
-            
-            # Load the certificate
-            context.load_cert_chain(cert_file, key_file)
-            
+        load_certificate(context)
     except Exception as e:
         print(f"⚠️  Could not create SSL certificate: {e}")
         print("🔧 Falling back to HTTP server on port 8080...")
         
         # Fallback to HTTP
-        httpd = http.server.HTTPServer(('localhost', 8080), http.server.SimpleHTTPRequestHandler)
+        httpd = http.server.ThreadingHTTPServer(('localhost', 8080), GzipRequestHandler)
+        httpd.daemon_threads = True
         print("🚀 AllSenses HTTP Demo Server Starting...")
         print("📱 Access demo at: http://localhost:8080/enhanced-emergency-monitor.html")
         print("⚠️  Note: Microphone access may be blocked on HTTP")